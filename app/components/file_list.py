@@ -5,6 +5,7 @@ from app.states.file_state import FileState, FileInfo
 def file_item(file: FileInfo) -> rx.Component:
     """Renders a single file item in the list."""
     is_selected = FileState.selected_file == file["name"]
+    is_compared = FileState.compare_files.contains(file["name"])
     return rx.el.div(
         rx.el.button(
             rx.el.div(
@@ -37,6 +38,19 @@ def file_item(file: FileInfo) -> rx.Component:
             on_click=FileState.select_file(file["name"]),
             class_name="flex-1 min-w-0",
         ),
+        rx.cond(
+            FileState.compare_mode & (file["type"] != "CSV"),
+            rx.el.button(
+                rx.cond(
+                    is_compared,
+                    rx.icon("square-check", class_name="h-4 w-4 text-indigo-600"),
+                    rx.icon("square", class_name="h-4 w-4 text-gray-400"),
+                ),
+                on_click=FileState.toggle_compare_file(file["name"]),
+                class_name="p-2 ml-2 hover:bg-indigo-50 rounded-lg transition-colors",
+                title="Include in comparison",
+            ),
+        ),
         rx.el.button(
             rx.icon(
                 "trash-2",
@@ -56,9 +70,23 @@ def file_item(file: FileInfo) -> rx.Component:
 def file_list() -> rx.Component:
     """Component to display the list of uploaded files."""
     return rx.el.div(
-        rx.el.h3(
-            "Uploaded Molecules",
-            class_name="text-xs font-bold text-gray-400 uppercase tracking-wider mb-4 px-1",
+        rx.el.div(
+            rx.el.h3(
+                "Uploaded Molecules",
+                class_name="text-xs font-bold text-gray-400 uppercase tracking-wider",
+            ),
+            rx.el.button(
+                rx.icon("layers", class_name="h-3 w-3 mr-1"),
+                "Compare",
+                on_click=FileState.toggle_compare_mode,
+                class_name=rx.cond(
+                    FileState.compare_mode,
+                    "flex items-center px-2 py-1 text-[10px] font-bold uppercase rounded bg-indigo-600 text-white",
+                    "flex items-center px-2 py-1 text-[10px] font-bold uppercase rounded bg-gray-100 text-gray-500 hover:bg-gray-200",
+                ),
+                title="Superimpose selected structures",
+            ),
+            class_name="flex items-center justify-between mb-4 px-1",
         ),
         rx.cond(
             FileState.has_files,
@@ -6,11 +6,27 @@ def pymol_viewer() -> rx.Component:
     """Component that renders the server-side generated PyMOL image."""
     return rx.el.div(
         rx.image(
-            src=rx.get_upload_url(FileState.generated_image),
+            src=rx.cond(
+                FileState.is_inline_image,
+                FileState.generated_image,
+                rx.get_upload_url(FileState.generated_image),
+            ),
             alt="Molecular Visualization",
             class_name="w-full h-full object-contain bg-white transition-opacity duration-300",
             loading="eager",
         ),
+        rx.cond(
+            FileState.is_comparing,
+            rx.el.div(
+                rx.icon("layers", class_name="h-3 w-3 mr-1.5 text-indigo-500"),
+                rx.el.span(
+                    f"Overlay of {FileState.compare_files.length()} structures, "
+                    f"aligned to {FileState.compare_files[0]}",
+                    class_name="text-xs font-semibold text-gray-600",
+                ),
+                class_name="absolute top-4 left-1/2 -translate-x-1/2 z-10 flex items-center bg-white/95 px-3 py-1.5 rounded-full shadow-sm border border-gray-100",
+            ),
+        ),
         rx.cond(
             FileState.is_rendering,
             rx.el.div(
@@ -20,7 +36,11 @@ def pymol_viewer() -> rx.Component:
                         class_name="animate-spin h-10 w-10 text-indigo-600 mb-3",
                     ),
                     rx.el.p(
-                        "Rendering high-quality ray-traced image...",
+                        rx.cond(
+                            FileState.backend_ready,
+                            "Rendering high-quality ray-traced image...",
+                            "Starting PyMOL backend...",
+                        ),
                         class_name="text-sm font-semibold text-gray-700",
                     ),
                     rx.el.p(
@@ -31,6 +51,25 @@ def pymol_viewer() -> rx.Component:
                 class_name="absolute inset-0 flex items-center justify-center z-10 bg-white/30 backdrop-blur-[1px] transition-all duration-300",
             ),
         ),
+        rx.cond(
+            FileState.render_busy_retry > 0,
+            rx.el.div(
+                rx.el.div(
+                    rx.icon("hourglass", class_name="h-4 w-4 text-amber-500 mr-2"),
+                    rx.el.span(
+                        f"Render service busy, retry in {FileState.render_busy_retry} s",
+                        class_name="text-xs font-semibold text-amber-700",
+                    ),
+                    rx.el.button(
+                        "Retry",
+                        on_click=FileState.trigger_render,
+                        class_name="ml-3 px-2 py-1 text-xs font-bold text-amber-700 bg-amber-100 rounded hover:bg-amber-200",
+                    ),
+                    class_name="flex items-center bg-amber-50 border border-amber-200 px-4 py-2 rounded-xl shadow-sm",
+                ),
+                class_name="absolute bottom-24 left-1/2 -translate-x-1/2 z-10",
+            ),
+        ),
         rx.cond(
             FileState.render_error != "",
             rx.el.div(
@@ -14,7 +14,7 @@ def upload_zone() -> rx.Component:
                         class_name="text-sm font-medium text-gray-700 text-center",
                     ),
                     rx.el.p(
-                        "PDB, SDF, MOL2, CIF",
+                        "PDB, SDF, MOL2, CIF (optionally .gz), CSV properties",
                         class_name="text-xs text-gray-400 mt-1 text-center",
                     ),
                     class_name="flex flex-col items-center justify-center p-6 border-2 border-dashed border-indigo-200 hover:border-indigo-400 rounded-xl bg-indigo-50/30 transition-colors cursor-pointer group-hover:bg-indigo-50",
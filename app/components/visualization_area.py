@@ -52,6 +52,15 @@ def view_settings_panel() -> rx.Component:
                 FileState.color_scheme,
                 FileState.set_color_scheme,
             ),
+            rx.cond(
+                FileState.property_tables.length() > 0,
+                control_select(
+                    "Property Table",
+                    FileState.property_tables,
+                    FileState.property_table,
+                    FileState.set_property_table,
+                ),
+            ),
             class_name="flex flex-col gap-3",
         ),
         class_name="absolute top-4 right-4 bg-white/95 backdrop-blur-sm p-4 rounded-xl shadow-lg border border-gray-100 z-10 transition-all hover:shadow-xl",
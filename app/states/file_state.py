@@ -5,22 +5,179 @@ import os
 import asyncio
 import uuid
 import logging
-import shutil
+import gzip
+import importlib.util
+import threading
+import base64
+import csv
+import io
 from pathlib import Path
+import numpy as np
+from app.states.lru_cache import LRUCache
+from app.states.render_admission import (
+    CACHED,
+    COALESCE,
+    RENDER_DEGRADED,
+    SHED,
+    RenderAdmission,
+)
 
-try:
-    import pymol
-    from pymol import cmd
+PYMOL_AVAILABLE = importlib.util.find_spec("pymol") is not None
+if not PYMOL_AVAILABLE:
+    logging.error("PyMOL not found. Visualization will not work.")
 
-    os.environ["PYMOL_LICENSE_FILE"] = ""
-    try:
-        pymol.finish_launching(["pymol", "-cq"])
-    except Exception as e:
-        logging.exception(f"Error launching PyMOL: {e}")
-    PYMOL_AVAILABLE = True
-except ImportError as e:
-    PYMOL_AVAILABLE = False
-    logging.exception(f"PyMOL not found. Visualization will not work. Error: {e}")
+_pymol_cmd = None
+_pymol_lock = threading.Lock()
+
+
+def get_pymol_cmd():
+    """Import and launch PyMOL on first use, returning ``pymol.cmd``.
+
+    Launching is deferred out of module import so that app workers, hot reloads
+    and imports that never render do not pay PyMOL's startup cost.
+    """
+    global _pymol_cmd
+    if _pymol_cmd is not None:
+        return _pymol_cmd
+    with _pymol_lock:
+        if _pymol_cmd is None:
+            started = time.perf_counter()
+            os.environ["PYMOL_LICENSE_FILE"] = ""
+            import pymol
+
+            try:
+                pymol.finish_launching(["pymol", "-cq"])
+            except Exception as e:
+                logging.exception(f"Error launching PyMOL: {e}")
+            _pymol_cmd = pymol.cmd
+            logging.info(f"PyMOL launched in {time.perf_counter() - started:.2f}s")
+    return _pymol_cmd
+
+
+def pymol_ready() -> bool:
+    """Readiness probe: True once the PyMOL backend has been launched."""
+    return _pymol_cmd is not None
+
+
+COMPRESS_UPLOADS = os.environ.get("COMPRESS_UPLOADS", "1") != "0"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def stored_path(upload_dir: Path, filename: str) -> Path:
+    """Resolve the on-disk path of an uploaded structure, preferring the gzip copy."""
+    compressed = upload_dir / f"{filename}.gz"
+    if compressed.exists():
+        return compressed
+    return upload_dir / filename
+
+
+def store_upload(upload_dir: Path, filename: str, data: bytes) -> Path:
+    """Write an upload to disk, gzip-compressed when COMPRESS_UPLOADS is enabled.
+
+    PyMOL reads ``.gz`` structure files directly, so renders load the compressed
+    copy without an intermediate decompression step.
+    """
+    is_gzip = data[:2] == GZIP_MAGIC
+    if COMPRESS_UPLOADS:
+        outfile = upload_dir / f"{filename}.gz"
+        payload = data if is_gzip else gzip.compress(data, compresslevel=6)
+    else:
+        outfile = upload_dir / filename
+        payload = gzip.decompress(data) if is_gzip else data
+    outfile.write_bytes(payload)
+    stale = upload_dir / (filename if COMPRESS_UPLOADS else f"{filename}.gz")
+    stale.unlink(missing_ok=True)
+    return outfile
+
+
+RENDER_DELIVERY = os.environ.get("RENDER_DELIVERY", "inline")
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "32"))
+ALIGNMENT_CACHE_SIZE = int(os.environ.get("ALIGNMENT_CACHE_SIZE", "64"))
+PROPERTY_CACHE_SIZE = int(os.environ.get("PROPERTY_CACHE_SIZE", "16"))
+
+
+MAX_RENDER_QUEUE = int(os.environ.get("MAX_RENDER_QUEUE", "4"))
+MAX_SESSION_RENDERS = int(os.environ.get("MAX_SESSION_RENDERS", "1"))
+FULL_RENDER_SIZE = (1200, 900)
+DEGRADED_RENDER_SIZE = (600, 450)
+_render_admission = RenderAdmission(MAX_RENDER_QUEUE, MAX_SESSION_RENDERS)
+_render_lock = threading.Lock()
+_render_cache = LRUCache(RENDER_CACHE_SIZE)
+_alignment_cache = LRUCache(ALIGNMENT_CACHE_SIZE)
+_property_cache = LRUCache(PROPERTY_CACHE_SIZE)
+
+
+def file_key(file_path: Path) -> tuple[str, int]:
+    """Identify a stored structure by path and modification time for caching."""
+    return (str(file_path), file_path.stat().st_mtime_ns)
+
+
+def encode_render(output_path: Path) -> str:
+    """Read a rendered PNG into a data URL and remove the temporary file."""
+    data = output_path.read_bytes()
+    output_path.unlink(missing_ok=True)
+    return "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+def read_property_table(table_path: Path) -> dict[tuple[str, str], float]:
+    """Parse a CSV property table into a ``(chain, resi) -> value`` lookup.
+
+    The table needs a ``resi`` column, an optional ``chain`` column and a
+    ``value`` column; without ``value`` the first other column is used.
+    """
+    data = table_path.read_bytes()
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    reader = csv.reader(io.StringIO(data.decode("utf-8-sig")))
+    header = [column.strip().lower() for column in next(reader, [])]
+    if "resi" not in header:
+        raise ValueError("Property table needs a 'resi' column.")
+    value_columns = [c for c in header if c not in ("chain", "resi")]
+    if not value_columns:
+        raise ValueError("Property table has no value column.")
+    value_index = header.index("value" if "value" in header else value_columns[0])
+    resi_index = header.index("resi")
+    chain_index = header.index("chain") if "chain" in header else None
+    table = {}
+    for row in reader:
+        if len(row) <= max(value_index, resi_index):
+            continue
+        try:
+            value = float(row[value_index])
+        except ValueError:
+            continue
+        chain = row[chain_index].strip() if chain_index is not None else ""
+        table[(chain, row[resi_index].strip())] = value
+    return table
+
+
+def is_property_table(filename: str) -> bool:
+    """Whether an uploaded file is a property table rather than a structure."""
+    return filename.lower().endswith(".csv")
+
+
+def map_properties(
+    chains: list[str], resis: list[str], table: dict[tuple[str, str], float]
+) -> np.ndarray:
+    """Join per-atom chain/residue keys against a property table.
+
+    Atoms are reduced to their unique residues with ``np.unique``, each residue
+    is looked up once, and the result is expanded back to atoms through the
+    inverse index. Returns a float32 ``(n_atoms, 2)`` array of ``(value,
+    matched)`` rows in atom order, ready to be written to the B-factor and
+    occupancy columns in a single ``cmd.alter`` pass. Tables without a chain
+    column match on residue number alone.
+    """
+    chainless = all(chain == "" for chain, _ in table)
+    atom_chains = [""] * len(resis) if chainless else chains
+    keys = np.array([atom_chains, resis], dtype=str).T.reshape(-1, 2)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    residue_values = np.zeros((len(unique), 2), dtype=np.float32)
+    for i, (chain, resi) in enumerate(unique.tolist()):
+        value = table.get((chain, resi))
+        if value is not None:
+            residue_values[i] = (value, 1.0)
+    return residue_values[inverse.reshape(-1)]
 
 
 class FileInfo(TypedDict):
@@ -45,11 +202,17 @@ class FileState(rx.State):
     is_uploading: bool = False
     generated_image: str = "/placeholder.svg"
     is_rendering: bool = False
+    render_busy_retry: int = 0
+    _render_pending: bool = False
+    backend_ready: bool = False
     render_error: str = ""
     representation: str = "cartoon"
     color_scheme: str = "chain"
     view_preset: str = "front"
     zoom_level: int = 0
+    compare_mode: bool = False
+    compare_files: list[str] = []
+    property_table: str = ""
     representation_options: list[str] = [
         "cartoon",
         "surface",
@@ -66,6 +229,7 @@ class FileState(rx.State):
         "ss",
         "rainbow",
         "b-factor",
+        "property",
         "red",
         "blue",
         "green",
@@ -76,6 +240,8 @@ class FileState(rx.State):
         "chemical/x-mol2": [".mol2"],
         "chemical/x-sdf": [".sdf"],
         "text/plain": [".cif", ".xyz", ".gro"],
+        "text/csv": [".csv"],
+        "application/gzip": [".gz"],
     }
 
     @rx.event
@@ -83,19 +249,33 @@ class FileState(rx.State):
         """Initialize the app by copying the default asset to the upload dir."""
         upload_dir = rx.get_upload_dir()
         upload_dir.mkdir(parents=True, exist_ok=True)
-        target_path = upload_dir / "practice.pdb"
         source_path = Path("assets/practice.pdb")
-        if not target_path.exists():
+        if not stored_path(upload_dir, "practice.pdb").exists():
             try:
                 if source_path.exists():
-                    await asyncio.to_thread(shutil.copy, source_path, target_path)
+                    data = await asyncio.to_thread(source_path.read_bytes)
+                    target_path = await asyncio.to_thread(
+                        store_upload, upload_dir, "practice.pdb", data
+                    )
                     logging.info(f"Copied {source_path} to {target_path}")
                 else:
                     logging.warning(f"Default file {source_path} not found in assets.")
             except Exception as e:
                 logging.exception(f"Failed to copy default file: {e}")
+        yield FileState.warm_backend
         yield FileState.trigger_render
 
+    @rx.event(background=True)
+    async def warm_backend(self):
+        """Launch PyMOL off the event loop and report readiness to the client."""
+        if PYMOL_AVAILABLE and not pymol_ready():
+            try:
+                await asyncio.to_thread(get_pymol_cmd)
+            except Exception as e:
+                logging.exception(f"Failed to warm PyMOL backend: {e}")
+        async with self:
+            self.backend_ready = pymol_ready()
+
     @rx.event
     def set_representation(self, style: str):
         """Update the molecular representation style."""
@@ -108,6 +288,13 @@ class FileState(rx.State):
         self.color_scheme = color
         return FileState.trigger_render
 
+    @rx.event
+    def set_property_table(self, table: str):
+        """Color the structure by values from an uploaded property table."""
+        self.property_table = table
+        self.color_scheme = "property"
+        return FileState.trigger_render
+
     @rx.event
     def set_view_preset(self, preset: str):
         """Set the camera view preset."""
@@ -124,6 +311,11 @@ class FileState(rx.State):
     @rx.event
     def export_image(self):
         """Trigger image export (handled via browser download of the current image)."""
+        if self.generated_image.startswith("data:"):
+            return rx.download(
+                data=base64.b64decode(self.generated_image.split(",", 1)[1]),
+                filename=f"render_{self.selected_file}.png",
+            )
         return rx.download(
             url=f"/_upload/{self.generated_image}",
             filename=f"render_{self.selected_file}.png",
@@ -142,9 +334,15 @@ class FileState(rx.State):
         last_file_name = ""
         for file in files:
             upload_data = await file.read()
-            outfile = upload_dir / file.name
-            with outfile.open("wb") as f:
-                f.write(upload_data)
+            file_name = file.name.removesuffix(".gz")
+            try:
+                await asyncio.to_thread(
+                    store_upload, upload_dir, file_name, upload_data
+                )
+            except Exception as e:
+                logging.exception(f"Failed to store upload {file.name}: {e}")
+                yield rx.toast(f"Could not store {file.name}: {e}", duration=5000)
+                continue
             size_bytes = len(upload_data)
             if size_bytes < 1024:
                 size_str = f"{size_bytes} B"
@@ -153,17 +351,18 @@ class FileState(rx.State):
             else:
                 size_str = f"{size_bytes / (1024 * 1024):.1f} MB"
             file_info: FileInfo = {
-                "name": file.name,
+                "name": file_name,
                 "size": size_str,
-                "type": file.name.split(".")[-1].upper(),
+                "type": file_name.split(".")[-1].upper(),
                 "uploaded_at": time.strftime("%Y-%m-%d %H:%M"),
             }
             self.uploaded_files = [
-                f for f in self.uploaded_files if f["name"] != file.name
+                f for f in self.uploaded_files if f["name"] != file_name
             ]
             self.uploaded_files.append(file_info)
             count += 1
-            last_file_name = file.name
+            if not is_property_table(file_name):
+                last_file_name = file_name
         self.is_uploading = False
         yield rx.toast(f"Successfully uploaded {count} files", duration=3000)
         if not self.selected_file and last_file_name:
@@ -173,27 +372,65 @@ class FileState(rx.State):
     @rx.event
     async def select_file(self, filename: str):
         """Select a file for visualization and trigger load."""
-        self.selected_file = filename
+        if is_property_table(filename):
+            self.property_table = filename
+            self.color_scheme = "property"
+        else:
+            self.selected_file = filename
         yield FileState.trigger_render
 
+    @rx.event
+    def toggle_compare_mode(self):
+        """Switch between single-structure and aligned comparison rendering."""
+        self.compare_mode = not self.compare_mode
+        if self.compare_mode and not self.compare_files and self.selected_file:
+            self.compare_files = [self.selected_file]
+        return FileState.trigger_render
+
+    @rx.event
+    def toggle_compare_file(self, filename: str):
+        """Add or remove a file from the comparison set.
+
+        The first file in the set is the reference the others are aligned onto.
+        """
+        if is_property_table(filename):
+            return
+        if filename in self.compare_files:
+            self.compare_files = [f for f in self.compare_files if f != filename]
+        else:
+            self.compare_files = self.compare_files + [filename]
+        return FileState.trigger_render
+
     @rx.event
     async def delete_file(self, filename: str):
         """Remove a file from the list."""
+        needs_render = self.compare_mode and filename in self.compare_files
         self.uploaded_files = [f for f in self.uploaded_files if f["name"] != filename]
+        self.compare_files = [f for f in self.compare_files if f != filename]
+        if self.property_table == filename:
+            self.property_table = ""
+            if self.color_scheme == "property":
+                self.color_scheme = "chain"
+            needs_render = True
         if self.selected_file == filename:
-            self.selected_file = (
-                "" if not self.uploaded_files else self.uploaded_files[0]["name"]
-            )
-            if self.selected_file:
-                yield FileState.trigger_render
-            else:
-                self.generated_image = "/placeholder.svg"
+            structures = [
+                f["name"]
+                for f in self.uploaded_files
+                if not is_property_table(f["name"])
+            ]
+            self.selected_file = structures[0] if structures else ""
+            needs_render = True
+        if not self.selected_file:
+            self.generated_image = "/placeholder.svg"
+        elif needs_render:
+            yield FileState.trigger_render
 
     @rx.event
     async def trigger_render(self):
         """Start the background rendering process."""
         if not self.selected_file:
             return
+        self.render_busy_retry = 0
         self.is_rendering = True
         yield FileState.render_molecule
 
@@ -206,98 +443,280 @@ class FileState(rx.State):
                 self.is_rendering = False
                 return
             upload_dir = rx.get_upload_dir()
-            file_path = upload_dir / self.selected_file
-            if not file_path.exists():
+            if self.compare_mode and len(self.compare_files) >= 2:
+                names = list(self.compare_files)
+            else:
+                names = [self.selected_file]
+            file_paths = [stored_path(upload_dir, name) for name in names]
+            if not all(path.exists() for path in file_paths):
                 self.render_error = "File not found."
                 self.is_rendering = False
                 return
-            current_file = str(file_path)
+            table_path = None
+            if self.color_scheme == "property":
+                if not self.property_table:
+                    self.render_error = "Upload or select a CSV property table."
+                    self.is_rendering = False
+                    return
+                table_path = stored_path(upload_dir, self.property_table)
+                if not table_path.exists():
+                    self.render_error = "Property table not found."
+                    self.is_rendering = False
+                    return
             rep_style = self.representation
             color_mode = self.color_scheme
             view_preset = self.view_preset
             zoom_val = self.zoom_level
-        output_filename = f"render_{uuid.uuid4().hex[:8]}.png"
-        output_path = upload_dir / output_filename
-        try:
-            await asyncio.to_thread(
-                self._run_pymol_render,
-                current_file,
-                output_path,
-                rep_style,
-                color_mode,
-                view_preset,
-                zoom_val,
-            )
+        cache_key = (
+            tuple(file_key(path) for path in file_paths),
+            file_key(table_path) if table_path else None,
+            rep_style,
+            color_mode,
+            view_preset,
+            zoom_val,
+        )
+        session = self.router.session.client_token
+        decision, image = _render_admission.admit(session, _render_cache, cache_key)
+        if decision == COALESCE:
             async with self:
-                self.generated_image = output_filename
+                self._render_pending = True
+            return
+        if decision == CACHED:
+            async with self:
+                self.generated_image = image
                 self.render_error = ""
+                self.render_busy_retry = 0
+                self.is_rendering = False
+            return
+        if decision == SHED:
+            async with self:
+                if image is not None:
+                    self.generated_image = image
+                self.render_busy_retry = _render_admission.retry_after()
                 self.is_rendering = False
+            return
+        degraded = decision == RENDER_DEGRADED
+        size = DEGRADED_RENDER_SIZE if degraded else FULL_RENDER_SIZE
+        output_filename = f"render_{uuid.uuid4().hex[:8]}.png"
+        output_path = upload_dir / output_filename
+        render_seconds = None
+        image = None
+        error = ""
+        try:
+            if len(file_paths) > 1:
+                render_seconds = await asyncio.to_thread(
+                    self._run_pymol_compare,
+                    file_paths,
+                    table_path,
+                    output_path,
+                    rep_style,
+                    color_mode,
+                    view_preset,
+                    zoom_val,
+                    size,
+                )
+            else:
+                render_seconds = await asyncio.to_thread(
+                    self._run_pymol_render,
+                    file_paths[0],
+                    table_path,
+                    output_path,
+                    rep_style,
+                    color_mode,
+                    view_preset,
+                    zoom_val,
+                    size,
+                )
+            if not output_path.exists():
+                raise RuntimeError("PyMOL did not write an image.")
+            if RENDER_DELIVERY == "inline":
+                image = await asyncio.to_thread(encode_render, output_path)
+            else:
+                image = output_filename
         except Exception as e:
             logging.exception(f"Rendering failed: {e}")
-            async with self:
-                self.render_error = f"Rendering failed: {str(e)}"
+            error = f"Rendering failed: {str(e)}"
+        finally:
+            _render_admission.complete(
+                session, _render_cache, cache_key, image, render_seconds, degraded
+            )
+        async with self:
+            rerun = self._render_pending
+            self._render_pending = False
+            if not rerun:
+                if image is not None:
+                    self.generated_image = image
+                    self.backend_ready = True
+                self.render_error = error
+                self.render_busy_retry = 0
                 self.is_rendering = False
+        if rerun:
+            yield FileState.render_molecule
+
+    def _run_pymol_render(
+        self, file_path, table_path, output_path, style, color, view, zoom, size
+    ):
+        """Synchronous PyMOL commands run in thread.
 
-    def _run_pymol_render(self, file_path, output_path, style, color, view, zoom):
-        """Synchronous PyMOL commands run in thread."""
+        Returns the seconds spent rendering, excluding the wait for the lock.
+        """
         try:
-            file_path_str = str(file_path)
-            output_path_str = str(output_path)
-            cmd.reinitialize()
-            cmd.load(file_path_str)
-            cmd.hide("all")
-            if style == "cartoon":
-                cmd.show("cartoon")
-            elif style == "surface":
-                cmd.show("surface")
-            elif style == "sticks":
-                cmd.show("sticks")
-            elif style == "spheres":
-                cmd.show("spheres")
-            elif style == "ribbon":
-                cmd.show("ribbon")
-            elif style == "lines":
-                cmd.show("lines")
-            elif style == "dots":
-                cmd.show("dots")
-            elif style == "mesh":
-                cmd.show("mesh")
-            else:
-                cmd.show("cartoon")
-            if color == "chain":
-                cmd.util.cbc()
-            elif color == "element":
-                cmd.util.cba()
-                cmd.color("green", "carbon")
-            elif color == "ss":
-                cmd.util.cbss()
-            elif color == "rainbow":
-                cmd.spectrum("count", "rainbow")
-            elif color == "b-factor":
-                cmd.spectrum("b", "blue_white_red")
-            elif color in ["red", "blue", "green", "gray"]:
-                cmd.color(color, "all")
-            cmd.orient()
-            if view == "back":
-                cmd.turn("y", 180)
-            elif view == "left":
-                cmd.turn("y", 90)
-            elif view == "right":
-                cmd.turn("y", -90)
-            elif view == "top":
-                cmd.turn("x", 90)
-            elif view == "bottom":
-                cmd.turn("x", -90)
-            buffer_val = -1 * zoom * 1.5
-            if buffer_val < -5:
-                buffer_val = -5
-            cmd.zoom("all", buffer=buffer_val)
-            cmd.ray(1200, 900)
-            cmd.png(output_path_str)
+            cmd = get_pymol_cmd()
+            with _render_lock:
+                started = time.perf_counter()
+                cmd.reinitialize()
+                cmd.load(str(file_path))
+                if table_path is not None:
+                    self._apply_properties(cmd, "all", file_path, table_path)
+                self._style_and_save(cmd, output_path, style, color, view, zoom, size)
+                return time.perf_counter() - started
         except Exception as e:
             logging.exception(f"PyMOL execution error: {e}")
             raise e
 
+    def _run_pymol_compare(
+        self, file_paths, table_path, output_path, style, color, view, zoom, size
+    ):
+        """Load several structures, superimpose them onto the first and render.
+
+        With ``matrix_mode`` 1 the superposition is stored in the mobile object's
+        matrix rather than its coordinates. That 4x4 matrix is cached per
+        (reference, mobile) pair, so style and view changes reapply it instead of
+        re-running the alignment. Failed alignments are not cached. Returns the
+        seconds spent rendering, excluding the wait for the lock.
+        """
+        try:
+            cmd = get_pymol_cmd()
+            with _render_lock:
+                started = time.perf_counter()
+                cmd.reinitialize()
+                names = []
+                for i, path in enumerate(file_paths):
+                    name = f"structure_{i}"
+                    cmd.load(str(path), name)
+                    names.append(name)
+                reference = names[0]
+                reference_key = file_key(file_paths[0])
+                cmd.set("matrix_mode", 1)
+                for name, path in zip(names[1:], file_paths[1:]):
+                    key = (reference_key, file_key(path))
+                    matrix = _alignment_cache.get(key)
+                    if matrix is not None:
+                        cmd.transform_object(name, matrix, homogenous=1)
+                        continue
+                    try:
+                        cmd.super(name, reference)
+                    except Exception as e:
+                        logging.warning(f"Could not align {path.name}: {e}")
+                        continue
+                    _alignment_cache.put(key, cmd.get_object_matrix(name))
+                if table_path is not None:
+                    for name, path in zip(names, file_paths):
+                        self._apply_properties(cmd, name, path, table_path)
+                self._style_and_save(
+                    cmd, output_path, style, color, view, zoom, size, by_object=True
+                )
+                return time.perf_counter() - started
+        except Exception as e:
+            logging.exception(f"PyMOL execution error: {e}")
+            raise e
+
+    def _apply_properties(self, cmd, selection, file_path, table_path):
+        """Write property-table values into the B-factor column of ``selection``.
+
+        The mapped float32 array is cached per (structure, table) pair, so
+        recoloring only costs one ``cmd.alter`` call.
+        """
+        key = (file_key(file_path), file_key(table_path))
+        mapped = _property_cache.get(key)
+        if mapped is None:
+            chains, resis = [], []
+            cmd.iterate(
+                selection,
+                "chains.append(chain); resis.append(resi)",
+                space={"chains": chains, "resis": resis},
+            )
+            table = read_property_table(table_path)
+            mapped = map_properties(chains, resis, table)
+            _property_cache.put(key, mapped)
+        values = iter(mapped.tolist())
+        cmd.alter(selection, "(b, q) = next(values)", space={"values": values})
+
+    def _style_and_save(
+        self, cmd, output_path, style, color, view, zoom, size, by_object=False
+    ):
+        """Apply representation, coloring and camera settings, then ray-trace."""
+        output_path_str = str(output_path)
+        cmd.hide("all")
+        if style == "cartoon":
+            cmd.show("cartoon")
+        elif style == "surface":
+            cmd.show("surface")
+        elif style == "sticks":
+            cmd.show("sticks")
+        elif style == "spheres":
+            cmd.show("spheres")
+        elif style == "ribbon":
+            cmd.show("ribbon")
+        elif style == "lines":
+            cmd.show("lines")
+        elif style == "dots":
+            cmd.show("dots")
+        elif style == "mesh":
+            cmd.show("mesh")
+        else:
+            cmd.show("cartoon")
+        if color == "chain" and by_object:
+            cmd.util.color_objs("all")
+        elif color == "chain":
+            cmd.util.cbc()
+        elif color == "element":
+            cmd.util.cba()
+            cmd.color("green", "carbon")
+        elif color == "ss":
+            cmd.util.cbss()
+        elif color == "rainbow":
+            cmd.spectrum("count", "rainbow")
+        elif color == "b-factor":
+            cmd.spectrum("b", "blue_white_red")
+        elif color == "property":
+            cmd.color("gray", "all")
+            cmd.spectrum("b", "blue_white_red", "q > 0.5")
+        elif color in ["red", "blue", "green", "gray"]:
+            cmd.color(color, "all")
+        cmd.orient()
+        if view == "back":
+            cmd.turn("y", 180)
+        elif view == "left":
+            cmd.turn("y", 90)
+        elif view == "right":
+            cmd.turn("y", -90)
+        elif view == "top":
+            cmd.turn("x", 90)
+        elif view == "bottom":
+            cmd.turn("x", -90)
+        buffer_val = -1 * zoom * 1.5
+        if buffer_val < -5:
+            buffer_val = -5
+        cmd.zoom("all", buffer=buffer_val)
+        cmd.ray(*size)
+        cmd.png(output_path_str)
+
+    @rx.var
+    def property_tables(self) -> list[str]:
+        """Names of uploaded CSV property tables."""
+        return [f["name"] for f in self.uploaded_files if f["type"] == "CSV"]
+
+    @rx.var
+    def is_comparing(self) -> bool:
+        """Whether the comparison view has enough structures to align."""
+        return self.compare_mode and len(self.compare_files) >= 2
+
+    @rx.var
+    def is_inline_image(self) -> bool:
+        """Whether the current render was delivered inline as a data URL."""
+        return self.generated_image.startswith("data:")
+
     @rx.var
     def has_files(self) -> bool:
         return len(self.uploaded_files) > 0
@@ -0,0 +1,131 @@
+import logging
+import math
+import threading
+
+ADMITTED = "admitted"
+SESSION_BUSY = "session_busy"
+SATURATED = "saturated"
+
+COALESCE = "coalesce"
+CACHED = "cached"
+SHED = "shed"
+RENDER = "render"
+RENDER_DEGRADED = "render_degraded"
+
+
+class RenderAdmission:
+    """Admission control for the PyMOL render path.
+
+    PyMOL runs one global session, so renders are serialized and every extra
+    request in flight adds its full render time to everyone's latency. This
+    bounds the total number of admitted renders (running plus waiting) and the
+    number any single session may hold, and estimates how long a rejected
+    client should wait before retrying. Callers are expected to coalesce
+    requests from a session that is already at its limit rather than shed them.
+    """
+
+    def __init__(self, max_queue: int, max_per_session: int):
+        self.max_queue = max_queue
+        self.max_per_session = max_per_session
+        self.avg_render_seconds = 2.0
+        self._active = 0
+        self._per_session: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def session_busy(self, session: str) -> bool:
+        """Whether ``session`` already holds as many renders as it may."""
+        with self._lock:
+            return self._per_session.get(session, 0) >= self.max_per_session
+
+    def try_acquire(self, session: str) -> str:
+        """Admit a render for ``session``.
+
+        Returns ``ADMITTED``, ``SESSION_BUSY`` when the session is at its own
+        limit, or ``SATURATED`` when the global queue is full.
+        """
+        with self._lock:
+            if self._per_session.get(session, 0) >= self.max_per_session:
+                return SESSION_BUSY
+            if self._active >= self.max_queue:
+                return SATURATED
+            self._active += 1
+            self._per_session[session] = self._per_session.get(session, 0) + 1
+            return ADMITTED
+
+    def release(self, session: str, duration: float | None = None):
+        """Release an admitted render.
+
+        ``duration`` is the time spent rendering, excluding queue wait, and is
+        passed only for successful full-quality renders.
+        """
+        with self._lock:
+            if session not in self._per_session:
+                logging.warning(f"Unmatched render release for session {session}")
+                return
+            self._active -= 1
+            remaining = self._per_session[session] - 1
+            if remaining > 0:
+                self._per_session[session] = remaining
+            else:
+                self._per_session.pop(session, None)
+            if duration is not None:
+                self.avg_render_seconds = 0.8 * self.avg_render_seconds + 0.2 * duration
+
+    def admit(self, session: str, cache, cache_key: tuple) -> tuple[str, object]:
+        """Decide how to serve a render request.
+
+        ``cache_key`` must start with the keys of the structures and property
+        table, which identify the fallback image shown when shedding. Returns
+        the decision and, for ``CACHED`` and ``SHED``, the image to show (the
+        exact cached render, or the latest render of the same structures and
+        table, which may be ``None``). ``RENDER`` and ``RENDER_DEGRADED`` hold an
+        admission slot that must be given back with ``complete``.
+        """
+        if self.session_busy(session):
+            return COALESCE, None
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return CACHED, cached
+        if self.try_acquire(session) != ADMITTED:
+            return SHED, cache.get(cache_key[:2])
+        return (RENDER_DEGRADED if self.degraded() else RENDER), None
+
+    def complete(
+        self,
+        session: str,
+        cache,
+        cache_key: tuple,
+        image,
+        render_seconds: float | None,
+        degraded: bool,
+    ):
+        """Cache the result of an admitted render and release its slot.
+
+        Degraded images are only stored as the structure's latest fallback, and
+        their render time is kept out of the full-quality average.
+        """
+        try:
+            if image is not None:
+                if not degraded:
+                    cache.put(cache_key, image)
+                cache.put(cache_key[:2], image)
+        finally:
+            self.release(session, None if degraded else render_seconds)
+
+    def degraded(self) -> bool:
+        """Whether load is high enough that new renders should use lower quality."""
+        with self._lock:
+            return self._active > self.max_queue // 2
+
+    def retry_after(self) -> int:
+        """Estimated seconds until a slot frees up, for the busy message.
+
+        Admission never lets the queue exceed ``max_queue``, so a rejected client
+        only has to wait for the running render to finish: one average render.
+        """
+        with self._lock:
+            return max(1, math.ceil(self.avg_render_seconds))
+
+    @property
+    def active(self) -> int:
+        return self._active
@@ -0,0 +1,134 @@
+"""Reproduce render-path saturation locally.
+
+Sends overlapping render requests from many sessions through the same
+admission path FileState.render_molecule uses: RenderAdmission.admit decides
+whether to coalesce, serve from cache, shed (with the latest image of the same
+structure as fallback) or render, and RenderAdmission.complete caches the result
+and releases the slot. Only the PyMOL call is replaced by a sleep under a lock,
+since renders are serialized in the app. Coalesced requests are re-run when the
+session's render finishes, as render_molecule does with _render_pending.
+
+    python -m scripts.load_test --sessions 20 --requests 5 --render-seconds 0.5
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+
+from app.states.lru_cache import LRUCache
+from app.states.render_admission import (
+    CACHED,
+    COALESCE,
+    RENDER_DEGRADED,
+    SHED,
+    RenderAdmission,
+)
+
+STRUCTURES = ("receptor_a.pdb", "receptor_b.pdb", "receptor_c.pdb")
+ZOOM_LEVELS = range(-2, 3)
+
+
+def simulated_render(lock: threading.Lock, seconds: float) -> float:
+    with lock:
+        started = time.perf_counter()
+        time.sleep(seconds)
+        return time.perf_counter() - started
+
+
+class Simulation:
+    def __init__(self, args):
+        self.args = args
+        self.admission = RenderAdmission(args.max_queue, args.max_per_session)
+        self.cache = LRUCache(args.cache_size)
+        self.lock = threading.Lock()
+        self.pending: dict[str, tuple] = {}
+        self.counts = {
+            "rendered": 0,
+            "coalesced": 0,
+            "cache_hits": 0,
+            "shed": 0,
+            "shed_with_fallback": 0,
+            "degraded": 0,
+        }
+        self.latencies: list[float] = []
+        self.retry_after: list[int] = []
+
+    async def request(self, session: str, cache_key: tuple):
+        decision, image = self.admission.admit(session, self.cache, cache_key)
+        if decision == COALESCE:
+            self.pending[session] = cache_key
+            self.counts["coalesced"] += 1
+            return
+        if decision == CACHED:
+            self.counts["cache_hits"] += 1
+            return
+        if decision == SHED:
+            self.counts["shed"] += 1
+            if image is not None:
+                self.counts["shed_with_fallback"] += 1
+            self.retry_after.append(self.admission.retry_after())
+            return
+        degraded = decision == RENDER_DEGRADED
+        seconds = self.args.render_seconds * (0.25 if degraded else 1.0)
+        started = time.perf_counter()
+        render_seconds = None
+        image = None
+        try:
+            render_seconds = await asyncio.to_thread(
+                simulated_render, self.lock, seconds
+            )
+            image = f"image-{cache_key}"
+        finally:
+            self.admission.complete(
+                session, self.cache, cache_key, image, render_seconds, degraded
+            )
+        self.counts["rendered"] += 1
+        self.counts["degraded"] += degraded
+        self.latencies.append(time.perf_counter() - started)
+        rerun = self.pending.pop(session, None)
+        if rerun is not None:
+            await self.request(session, rerun)
+
+    async def session(self, index: int):
+        session = f"session-{index}"
+        structure = (STRUCTURES[index % len(STRUCTURES)], 0)
+        tasks = []
+        for _ in range(self.args.requests):
+            await asyncio.sleep(random.uniform(0, self.args.render_seconds / 2))
+            cache_key = ((structure,), None, "cartoon", random.choice(ZOOM_LEVELS))
+            tasks.append(asyncio.create_task(self.request(session, cache_key)))
+        await asyncio.gather(*tasks)
+
+    async def run(self):
+        await asyncio.gather(*(self.session(i) for i in range(self.args.sessions)))
+        latencies = sorted(self.latencies)
+        print(f"requests:  {self.args.sessions * self.args.requests}")
+        for name, count in self.counts.items():
+            print(f"{name + ':':<20}{count}")
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"p50 latency: {statistics.median(latencies):.2f}s")
+            print(f"p95 latency: {p95:.2f}s")
+            print(f"max latency: {latencies[-1]:.2f}s")
+        if self.retry_after:
+            print(f"max retry-after: {max(self.retry_after)}s")
+        if self.admission.active:
+            print(f"leaked slots: {self.admission.active}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--render-seconds", type=float, default=0.5)
+    parser.add_argument("--max-queue", type=int, default=4)
+    parser.add_argument("--max-per-session", type=int, default=1)
+    parser.add_argument("--cache-size", type=int, default=32)
+    asyncio.run(Simulation(parser.parse_args()).run())
+
+
+if __name__ == "__main__":
+    main()